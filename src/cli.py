@@ -0,0 +1,236 @@
+""" Single entry point for all pipeline steps. Modules of the steps are imported only when
+the corresponding subcommand is run, so startup does not pay for pandas and other dependencies.
+Parameters are taken from defaults, then from json config file (section with the name of
+subcommand), then from command line arguments"""
+import argparse
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_CONFIG = {
+    "liftover": {
+        "step": 2,
+        "initial_bkpt_path": "../cancer_breakpoints_hotspots_prediction/data/raw breakpoints/all_cancer_data_eda.csv",
+        "hg19_path": "data/hg19_breakpoints.txt",
+        "err_path": "data/hg19_breakpoints_err.txt",
+        "hg38_path": "data/hg38_breakpoints.bed",
+        "out_path": "data/hg38_breakpoints_wo_err.csv",
+        "bad_rows_path": "data/bad_rows.csv",
+    },
+    "filter": {
+        "all_cancers_path": "../cancer_breakpoints_hotspots_prediction/data/raw breakpoints",
+        "breakpoints_path": "data/hg38_breakpoints_wo_err.csv",
+        "bad_regions_path": "data/all_excluded_regions.csv",
+        "out_path": "data/breakpoints_wo_bad_regions.csv",
+    },
+    "windows": {
+        "main_path": "data/dataset/",
+        "breakpoints_path": "data/breakpoints_wo_bad_regions.csv",
+        "win_len": 512,
+        "run_number": 1,
+        "n_negative_points": 1000000,
+        "index_bed": False,
+        "table_format": "csv",
+        "chr_lengths_path": "data/chr_lengths.json",
+    },
+    "extract": {
+        "main_path": "data/dataset/",
+        "genome_path": "hg38.fa",
+        "win_len": 512,
+    },
+    "datasets": {
+        "main_input_path": "data/dataset/",
+        "n_times_neg_more": 1,
+        "win_len": 512,
+        "run_number": 1,
+        "bad_regions_path": "data/all_excluded_regions.csv",
+        "table_format": "csv",
+        "seed": 42,
+        "chr_lengths_path": "data/chr_lengths.json",
+    },
+}
+
+CHOICES = {"table_format": ["csv", "parquet"]}
+
+HELP = {
+    "liftover": "step 1: save hg19 coordinates for liftover, step 2: merge hg38 coordinates",
+    "filter": "remove breakpoints in excluded regions and add cancer type",
+    "windows": "generate positive and negative windows and save them in csv and bed formats",
+    "extract": "get DNA sequences of windows with bedtools",
+    "datasets": "collect final datasets for each cancer type",
+}
+
+
+def parse_bool(value: str) -> bool:
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise argparse.ArgumentTypeError(f"Boolean value expected, got {value}")
+
+
+def get_converter(default: Any) -> Callable[[str], Any]:
+    return parse_bool if isinstance(default, bool) else type(default)
+
+
+def convert_config_value(command: str, name: str, value: Any) -> Any:
+    """ Checks type of value from config file: it should have the type of default value
+    or be a string which is converted the same way as command line argument
+
+    Args:
+        command (str): subcommand name
+        name (str): parameter name
+        value (Any): value from config file
+
+    Returns:
+        Any: converted value
+    """
+    default = DEFAULT_CONFIG[command][name]
+    if type(value) is not type(default):
+        if not isinstance(value, str):
+            raise ValueError(
+                f"{command}.{name} should be {type(default).__name__}, got {value!r}"
+            )
+        try:
+            value = get_converter(default)(value)
+        except (ValueError, argparse.ArgumentTypeError):
+            raise ValueError(
+                f"{command}.{name} should be {type(default).__name__}, got {value!r}"
+            )
+    if name in CHOICES and value not in CHOICES[name]:
+        raise ValueError(f"{command}.{name} should be one of {CHOICES[name]}, got {value!r}")
+    return value
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """ Creates parser with one subcommand per pipeline step. Options of subcommands
+    are generated from `DEFAULT_CONFIG`
+
+    Returns:
+        argparse.ArgumentParser: parser
+    """
+    parser = argparse.ArgumentParser(prog="bkpt-pipeline", description=__doc__)
+    parser.add_argument("--config", help="path to json config file", default=None, type=str)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command, params in DEFAULT_CONFIG.items():
+        subparser = subparsers.add_parser(command, help=HELP[command])
+        for name, default in params.items():
+            subparser.add_argument(
+                f"--{name}",
+                help=f"default: {default}",
+                default=None,
+                type=get_converter(default),
+                choices=CHOICES.get(name),
+            )
+    return parser
+
+
+def get_params(command: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """ Merges parameters of subcommand from defaults, config file and command line
+
+    Args:
+        command (str): subcommand name
+        args (argparse.Namespace): parsed command line arguments
+
+    Returns:
+        Dict[str, Any]: parameters
+    """
+    params = dict(DEFAULT_CONFIG[command])
+    if args.config is not None:
+        with open(args.config, "r") as f:
+            config = json.load(f)
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if len(unknown) > 0:
+            raise ValueError(f"Unknown sections in {args.config}: {sorted(unknown)}")
+        # all sections are checked, so that errors in config are found before any step is run
+        for section, section_params in config.items():
+            unknown = set(section_params) - set(DEFAULT_CONFIG[section])
+            if len(unknown) > 0:
+                raise ValueError(
+                    f"Unknown parameters for {section} in {args.config}: {sorted(unknown)}"
+                )
+            section_params = {
+                name: convert_config_value(section, name, value)
+                for name, value in section_params.items()
+            }
+            if section == command:
+                params.update(section_params)
+    for name in params:
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+    return params
+
+
+def run_liftover(params: Dict[str, Any]) -> None:
+    from src.convert_to_bed_to_get_hg38 import (
+        get_full_dataset,
+        prepare_file_for_convertation,
+    )
+
+    if params["step"] == 1:
+        # then upload the file to https://genome.ucsc.edu/cgi-bin/hgLiftOver
+        prepare_file_for_convertation(
+            filepath=params["initial_bkpt_path"], out_file=params["hg19_path"]
+        )
+    else:
+        get_full_dataset(
+            initial_bkpt_path=params["initial_bkpt_path"],
+            init_file=params["hg19_path"],
+            err_file=params["err_path"],
+            result_file=params["hg38_path"],
+            out_file=params["out_path"],
+            bad_rows_file=params["bad_rows_path"],
+        )
+
+
+def run_filter(params: Dict[str, Any]) -> None:
+    from src.filter_bad_breakpoints import filter_bad_regions, get_cancer_samples_mapping
+
+    filter_bad_regions(
+        breakpoints_path=params["breakpoints_path"],
+        bad_regions_path=params["bad_regions_path"],
+        out_path=params["out_path"],
+        df_cancer_mapping=get_cancer_samples_mapping(params["all_cancers_path"]),
+    )
+
+
+def run_windows(params: Dict[str, Any]) -> None:
+    from src.generate_windows import save_windows
+
+    save_windows(**params)
+
+
+def run_extract(params: Dict[str, Any]) -> None:
+    from src.generate_windows import extract_sequences
+
+    win_len = params["win_len"]
+    for prefix, label in [("pos", "positive"), ("neg", "negative")]:
+        extract_sequences(
+            genome_path=params["genome_path"],
+            bed_path=os.path.join(params["main_path"], f"{label}_all_cancers_{win_len}.bed"),
+            out_path=os.path.join(params["main_path"], f"{prefix}_{win_len}.bed"),
+        )
+
+
+def run_datasets(params: Dict[str, Any]) -> None:
+    from src.create_datasets import collect_datasets
+
+    collect_datasets(**params)
+
+
+COMMANDS = {
+    "liftover": run_liftover,
+    "filter": run_filter,
+    "windows": run_windows,
+    "extract": run_extract,
+    "datasets": run_datasets,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = get_parser().parse_args(argv)
+    COMMANDS[args.command](get_params(args.command, args))
+
+
+if __name__ == "__main__":
+    main()
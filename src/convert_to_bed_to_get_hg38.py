@@ -123,6 +123,7 @@ def get_full_dataset(
     err_file: str,
     result_file: str,
     out_file: str,
+    bad_rows_file: str = "data/bad_rows.csv",
 ) -> None:
     """Add as columns coordinates of hg38 in source dataset
 
@@ -132,6 +133,7 @@ def get_full_dataset(
         err_file (str): file with conversion errors
         result_file (str): result file with hg38 coordinates
         out_file (str): output file
+        bad_rows_file (str): output file for rows with different chromosome after conversion
     """
     good_bkpt = process_initial_data(initial_bkpt_path)
     hg38_coord = get_final_file(init_file, err_file, result_file)
@@ -144,7 +146,7 @@ def get_full_dataset(
     )
     print(good_bkpt[["chr", "chr_bkpt", "hg38_chr", "hg38_coord"]].head())
     print((good_bkpt["hg38_chr"] != good_bkpt["chr"]).astype(int).sum())
-    good_bkpt[good_bkpt["hg38_chr"] != good_bkpt["chr"]].to_csv("data/bad_rows.csv")
+    good_bkpt[good_bkpt["hg38_chr"] != good_bkpt["chr"]].to_csv(bad_rows_file)
     good_bkpt = good_bkpt[good_bkpt["hg38_chr"] == good_bkpt["chr"]]
     good_bkpt.to_csv(out_file)
 
@@ -3,6 +3,8 @@ import os
 import sqlite3
 import pandas as pd
 
+from src.storage import load_table, save_table
+
 
 def get_all_bad_regions_list() -> None:
     """Merges all the bad regions into 1 file"""
@@ -120,10 +122,13 @@ def filter_bad_regions(
     Args:
         breakpoints_path (str): path to breakpoints
         bad_regions_path (str): path to bad regions data
-        out_path (str): path to output data with excluded regions
+        out_path (str): path to output data with excluded regions (.csv or .parquet)
     """
     df_bkpt = (
-        pd.read_csv(breakpoints_path)[["hg38_chr", "hg38_coord", 'icgc_donor_id', 'icgc_sample_id']]
+        load_table(
+            breakpoints_path,
+            columns=["hg38_chr", "hg38_coord", "icgc_donor_id", "icgc_sample_id"]
+        )
         .rename(columns={"hg38_chr": "chr", "hg38_coord": "start"})
         .assign(end=lambda x: x['start'] + 1)
     )
@@ -134,7 +139,7 @@ def filter_bad_regions(
     df_bkpt = df_bkpt[df_bkpt["chr"] != "Y"]
     
     # remove bad regions
-    df_bad_regions = pd.read_csv(bad_regions_path).rename(
+    df_bad_regions = load_table(bad_regions_path).rename(
         columns={"chrom": "chr", "chromStart": "start", "chromEnd": "end"}
     )
     df_bad_regions['chr'] = df_bad_regions['chr'].map(lambda x: x.replace("chr", ""))
@@ -147,7 +152,10 @@ def filter_bad_regions(
     print(df_bkpt_all.shape[0])
     df = pd.merge(df_cancer_mapping, df_bkpt_all, on=['icgc_donor_id', 'icgc_sample_id'])
     print("final shape:", df.shape[0])
-    df[["cancer_type", "chr", "start", "end"]].to_csv(out_path)
+    save_table(
+        df[["cancer_type", "chr", "start", "end"]].sort_values(["cancer_type", "chr", "start"]),
+        out_path
+    )
     # 468 472
     print("Number of resulting breakpoints:", df.shape[0])
 
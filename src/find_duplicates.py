@@ -0,0 +1,288 @@
+""" MinHash sketches of DNA windows to find near-duplicate sequences (across splits and
+cancer types) with LSH bucketing and to split datasets without leakage"""
+import argparse
+import os
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import tqdm
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.storage import load_table
+
+# k-mers are packed in uint64 by 2 bits per nucleotide
+MAX_K = 32
+# A, C, G, T -> 0..3, everything else (N, etc.) -> 4
+NUCLEOTIDE_CODES = np.full(256, 4, dtype=np.uint64)
+for code, nucleotide in enumerate("ACGT"):
+    NUCLEOTIDE_CODES[ord(nucleotide)] = code
+    NUCLEOTIDE_CODES[ord(nucleotide.lower())] = code
+
+
+def get_kmer_hashes(dna_seq: str, k: int) -> np.ndarray:
+    """ Encodes all k-mers of a sequence as unique 2-bit packed integers.
+    K-mers containing unknown nucleotides (N) are skipped
+
+    Args:
+        dna_seq (str): DNA sequence
+        k (int): k-mer length (from 1 to 32)
+
+    Returns:
+        np.ndarray: unique k-mer codes
+    """
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k-mer length should be from 1 to {MAX_K}, got {k}")
+    codes = NUCLEOTIDE_CODES[np.frombuffer(dna_seq.encode(), dtype=np.uint8)]
+    if codes.shape[0] < k:
+        return np.empty(0, dtype=np.uint64)
+    windows = sliding_window_view(codes, k)
+    is_valid = (windows < 4).all(axis=1)
+    powers = np.uint64(4) ** np.arange(k - 1, -1, -1, dtype=np.uint64)
+    return np.unique((windows[is_valid] * powers).sum(axis=1, dtype=np.uint64))
+
+
+def compute_signatures(
+    sequences: List[str], k: int = 21, num_perm: int = 128, seed: int = 42
+) -> np.ndarray:
+    """ Computes MinHash signature for each sequence
+
+    Args:
+        sequences (List[str]): DNA sequences (e.g. `dna_seq` column)
+        k (int): k-mer length
+        num_perm (int): number of hash functions (signature length)
+        seed (int): random seed for hash functions
+
+    Returns:
+        np.ndarray: signatures of shape (len(sequences), num_perm)
+    """
+    rng = np.random.default_rng(seed)
+    # random odd multipliers and offsets for multiply-add hashing modulo 2^64
+    mult = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    add = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    signatures = np.full((len(sequences), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for i, dna_seq in enumerate(tqdm.tqdm(sequences)):
+        kmers = get_kmer_hashes(dna_seq, k)
+        if kmers.shape[0] == 0:
+            continue
+        hashes = kmers[:, None] * mult + add
+        hashes ^= hashes >> np.uint64(29)
+        signatures[i] = hashes.min(axis=0)
+    return signatures
+
+
+def get_candidate_pairs(
+    signatures: np.ndarray, n_bands: int = 32, max_bucket_size: int = 1000
+) -> np.ndarray:
+    """ Finds candidate pairs of near-duplicates: signatures are split in `n_bands` bands
+    and sequences which coincide in at least one band fall into one bucket.
+    Each member of a bucket is paired only with the representative of the bucket
+    (its first row), so the number of pairs is linear in the number of rows.
+    Rows without valid k-mers (e.g. all N) are not put in buckets
+
+    Args:
+        signatures (np.ndarray): MinHash signatures from `compute_signatures`
+        n_bands (int): number of LSH bands (must divide signature length)
+        max_bucket_size (int): buckets bigger than this are reported
+
+    Returns:
+        np.ndarray: unique pairs of row numbers (i < j) of shape (n_pairs, 2)
+    """
+    n_rows, num_perm = signatures.shape
+    assert num_perm % n_bands == 0, "Signature length should be divisible by n_bands"
+    band_len = num_perm // n_bands
+    rows = np.flatnonzero(~(signatures == np.iinfo(np.uint64).max).all(axis=1))
+    if rows.shape[0] < n_rows:
+        print("Number of rows without valid k-mers (not compared):", n_rows - rows.shape[0])
+    all_pairs = []
+    n_big_buckets, max_size = 0, 0
+    for band in range(n_bands):
+        band_values = np.ascontiguousarray(
+            signatures[rows, band * band_len : (band + 1) * band_len]
+        )
+        if band_values.shape[0] == 0:
+            break
+        _, bucket, bucket_size = np.unique(
+            band_values, axis=0, return_inverse=True, return_counts=True
+        )
+        bucket = bucket.reshape(-1)
+        n_big_buckets += int((bucket_size > max_bucket_size).sum())
+        max_size = max(max_size, int(bucket_size.max()))
+        # representative of a bucket is its first row
+        representative = np.full(bucket_size.shape[0], n_rows)
+        np.minimum.at(representative, bucket, rows)
+        members_rep = representative[bucket]
+        is_member = members_rep != rows
+        all_pairs.append(np.stack([members_rep[is_member], rows[is_member]], axis=1))
+    if n_big_buckets > 0:
+        print(
+            f"Number of buckets with more than {max_bucket_size} rows (summed over bands):",
+            n_big_buckets, "largest:", max_size
+        )
+    if len(all_pairs) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(all_pairs), axis=0)
+
+
+def get_near_duplicates(
+    signatures: np.ndarray, n_bands: int = 32, threshold: float = 0.5
+) -> pd.DataFrame:
+    """ Finds pairs of sequences with estimated Jaccard similarity of k-mer sets
+    not less than `threshold`. Rows are compared with representatives of their LSH buckets,
+    so groups of near-duplicates are connected (see `get_duplicate_clusters`)
+    but not every pair inside a group is listed
+
+    Args:
+        signatures (np.ndarray): MinHash signatures from `compute_signatures`
+        n_bands (int): number of LSH bands
+        threshold (float): minimal estimated Jaccard similarity
+
+    Returns:
+        pd.DataFrame: pairs with columns "index", "index_1" (row numbers) and "jaccard"
+    """
+    pairs = get_candidate_pairs(signatures, n_bands=n_bands)
+    jaccard = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    is_similar = jaccard >= threshold
+    df_pairs = pd.DataFrame(
+        {
+            "index": pairs[is_similar, 0],
+            "index_1": pairs[is_similar, 1],
+            "jaccard": jaccard[is_similar],
+        }
+    )
+    print("Number of candidate pairs:", pairs.shape[0])
+    print("Number of near-duplicate pairs:", df_pairs.shape[0])
+    return df_pairs
+
+
+def get_duplicate_clusters(n_rows: int, df_pairs: pd.DataFrame) -> np.ndarray:
+    """ Groups rows into clusters of near-duplicates (connected components of pairs)
+
+    Args:
+        n_rows (int): number of rows
+        df_pairs (pd.DataFrame): pairs from `get_near_duplicates`
+
+    Returns:
+        np.ndarray: cluster id for each row
+    """
+    parent = np.arange(n_rows)
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(df_pairs["index"].values, df_pairs["index_1"].values):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    return np.array([find(i) for i in range(n_rows)])
+
+
+def get_leaked_pairs(
+    df: pd.DataFrame, df_pairs: pd.DataFrame, group_col: str
+) -> pd.DataFrame:
+    """ Selects near-duplicate pairs which belong to different groups
+    (e.g. train/test split or cancer type). Pairs link rows to representatives of
+    their LSH buckets, so for full groups use `get_duplicate_clusters`
+
+    Args:
+        df (pd.DataFrame): dataset which rows were used to compute signatures
+        df_pairs (pd.DataFrame): pairs from `get_near_duplicates`
+        group_col (str): column with group label
+
+    Returns:
+        pd.DataFrame: pairs with group labels of both rows in columns `group_col`
+            and `group_col`_1
+    """
+    groups = df[group_col].values
+    df_leaked = df_pairs.assign(
+        **{
+            group_col: groups[df_pairs["index"].values],
+            group_col + "_1": groups[df_pairs["index_1"].values],
+        }
+    )
+    df_leaked = df_leaked[df_leaked[group_col] != df_leaked[group_col + "_1"]]
+    print(f"Number of near-duplicate pairs across {group_col}:", df_leaked.shape[0])
+    return df_leaked
+
+
+def leakage_free_split(
+    df: pd.DataFrame,
+    clusters: np.ndarray,
+    test_size: float = 0.2,
+    test_chromosomes: Optional[List[str]] = None,
+    seed: int = 42,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """ Splits dataset so that no cluster of near-duplicates is present in both parts.
+    * if `test_chromosomes` are set, test consists of windows from these chromosomes
+      except clusters which also have members on other chromosomes (they go to train)
+    * otherwise whole clusters in random order are assigned to test if they fit
+      into `test_size`
+
+    Args:
+        df (pd.DataFrame): dataset with column "chr"
+        clusters (np.ndarray): cluster id for each row from `get_duplicate_clusters`
+        test_size (float): approximate share of rows in test
+        test_chromosomes (Optional[List[str]]): chromosomes to put in test
+        seed (int): random seed
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: row numbers of train and test
+    """
+    if test_chromosomes is not None:
+        is_test_chr = df["chr"].astype(str).isin([str(c) for c in test_chromosomes]).values
+        clusters_in_train = np.unique(clusters[~is_test_chr])
+        is_test = is_test_chr & ~np.isin(clusters, clusters_in_train)
+    else:
+        cluster_ids, cluster_sizes = np.unique(clusters, return_counts=True)
+        order = np.random.default_rng(seed).permutation(cluster_ids.shape[0])
+        n_test_target = round(test_size * clusters.shape[0])
+        n_test_rows = 0
+        test_clusters = []
+        for cluster_id, cluster_size in zip(cluster_ids[order], cluster_sizes[order]):
+            # clusters which do not fit are skipped, smaller ones may still fit
+            if n_test_rows + cluster_size <= n_test_target:
+                test_clusters.append(cluster_id)
+                n_test_rows += cluster_size
+                if n_test_rows == n_test_target:
+                    break
+        is_test = np.isin(clusters, test_clusters)
+    return np.flatnonzero(~is_test), np.flatnonzero(is_test)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--folder", help="folder with final datasets", default="data/dataset/final", type=str
+    )
+    parser.add_argument(
+        "--threshold", help="minimal Jaccard similarity of k-mer sets", default=0.5, type=float
+    )
+    parser.add_argument("--k", help=f"k-mer length (1-{MAX_K})", default=21, type=int)
+    parser.add_argument(
+        "--win_len", help="window length of datasets to check", default=512, type=int
+    )
+    parser.add_argument(
+        "--table_format", help="format of datasets", default="csv", choices=["csv", "parquet"]
+    )
+    args = parser.parse_args()
+    if not 1 <= args.k <= MAX_K:
+        parser.error(f"--k should be from 1 to {MAX_K}")
+    # positives of all cancer types (negatives are random windows and rarely overlap)
+    all_pos = []
+    for fl in sorted(os.listdir(args.folder)):
+        if fl.endswith(f"_{args.win_len}.{args.table_format}"):
+            df_cancer = load_table(
+                os.path.join(args.folder, fl), columns=["chr", "start", "dna_seq", "label"]
+            )
+            df_cancer = df_cancer[df_cancer["label"] == 1]
+            df_cancer["cancer_type"] = os.path.splitext(fl)[0].rsplit("_", 2)[0]
+            all_pos.append(df_cancer)
+    # positives are the same in datasets with different class balance
+    df_all = pd.concat(all_pos).drop_duplicates(["cancer_type", "chr", "start"])
+    df_all = df_all.reset_index(drop=True)
+    signatures = compute_signatures(df_all["dna_seq"].tolist(), k=args.k)
+    df_pairs = get_near_duplicates(signatures, threshold=args.threshold)
+    df_leaked = get_leaked_pairs(df_all, df_pairs, group_col="cancer_type")
+    print(df_leaked.groupby(["cancer_type", "cancer_type_1"]).size())
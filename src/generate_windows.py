@@ -1,20 +1,45 @@
 """ Generate window arounf breakpoint or random location (positive and negative examples respectively)"""
 import argparse
+import functools
 import json
 import os
-from typing import Tuple
-import requests
+import re
+import subprocess
+from typing import Dict, Tuple
 import pandas as pd
 import tqdm
 import numpy as np
 
+from src.storage import load_table, save_table
 
-def generate_negative_different_length(win_len: int, negative_path: str) -> pd.DataFrame:
-    df = pd.read_csv(negative_path)[['position', 'chromosome', 'label']]
+CHR_LENGTHS_PATH = "data/chr_lengths.json"
+
+
+@functools.lru_cache(maxsize=None)
+def load_chr_lengths(chr_lengths_path: str = CHR_LENGTHS_PATH) -> Dict[str, int]:
+    """ Loads chromosome lengths (only once for each path)
+
+    Args:
+        chr_lengths_path (str): path to json with chromosome lengths
+
+    Returns:
+        Dict[str, int]: chromosome length by chromosome number
+    """
+    with open(chr_lengths_path, "r") as f:
+        return json.load(f)
+
+
+def generate_negative_different_length(
+    win_len: int, negative_path: str, chr_lengths_path: str = CHR_LENGTHS_PATH
+) -> pd.DataFrame:
+    df = load_table(negative_path, columns=['position', 'chromosome', 'label'])
     all_seq = []
     for _, bkpt in tqdm.tqdm(df.iterrows()):
         win_start, win_end = generate_window(
-            chrom=bkpt["chromosome"], pos=int(bkpt["position"]), win_len=win_len
+            chrom=bkpt["chromosome"],
+            pos=int(bkpt["position"]),
+            win_len=win_len,
+            chr_lengths_path=chr_lengths_path,
         )
         all_seq.append((win_start, win_end))
     df["win_start"] = [el[0] for el in all_seq]
@@ -22,20 +47,22 @@ def generate_negative_different_length(win_len: int, negative_path: str) -> pd.D
     return df
     
     
-def generate_window(chrom: str, pos: int, win_len: int) -> Tuple[int, int]:
+def generate_window(
+    chrom: str, pos: int, win_len: int, chr_lengths_path: str = CHR_LENGTHS_PATH
+) -> Tuple[int, int]:
     """ Generates window around point taking into account chromosome lengths
 
     Args:
         chrom (str): chromosome number
         pos (int): position (coordinate)
         win_len (int): window length to generate (total nucleotides)
+        chr_lengths_path (str): path to json with chromosome lengths
 
     Returns:
         Tuple[int, int]: start-end of window
     """
     # to check if chromosome is shorter
-    with open("data/chr_lengths.json", "r") as f:
-        chr_lengths = json.load(f)
+    chr_lengths = load_chr_lengths(chr_lengths_path)
     start = max(0, pos - round(win_len / 2))
     end = min(pos + round(win_len / 2) - 1, chr_lengths[str(chrom)])
     return start, end
@@ -52,26 +79,34 @@ def get_sequence(chrom: str, start: str, end: str) -> str:
     Returns:
         str: DNA sequence
     """
+    import requests
+
     addr = f"https://api.genome.ucsc.edu/getData/sequence?genome=hg38;chrom=chr{chrom};start={start};end={end}"
     answ = requests.post(addr).json()["dna"]
     return answ
 
 
-def get_positive_windows(csv_path: str, win_len: int) -> pd.DataFrame:
+def get_positive_windows(
+    csv_path: str, win_len: int, chr_lengths_path: str = CHR_LENGTHS_PATH
+) -> pd.DataFrame:
     """ For each breakpoint in a file generate window around it and set positive label
 
     Args:
-        csv_path (str): path to breakpoints data
+        csv_path (str): path to breakpoints data (.csv or .parquet)
         win_len (int): window length
+        chr_lengths_path (str): path to json with chromosome lengths
 
     Returns:
         pd.DataFrame: resulting DF
     """
-    df = pd.read_csv(csv_path)
+    df = load_table(csv_path)
     all_seq = []
     for _, bkpt in tqdm.tqdm(df.iterrows()):
         win_start, win_end = generate_window(
-            chrom=bkpt["chr"], pos=int(bkpt["start"]), win_len=win_len
+            chrom=bkpt["chr"],
+            pos=int(bkpt["start"]),
+            win_len=win_len,
+            chr_lengths_path=chr_lengths_path,
         )
         all_seq.append((win_start, win_end))
     df["win_start"] = [el[0] for el in all_seq]
@@ -82,21 +117,23 @@ def get_positive_windows(csv_path: str, win_len: int) -> pd.DataFrame:
     return df
 
 
-def get_negative_windows(n_points: int, win_len: int) -> pd.DataFrame:
+def get_negative_windows(
+    n_points: int, win_len: int, chr_lengths_path: str = CHR_LENGTHS_PATH
+) -> pd.DataFrame:
     """ Generates specified number of negative examples randomly from each chromosome.
     For each chromosome points are generated uniformly based on its length and excluding telomeres
 
     Args:
         n_points (int): number of points to generate
         win_len (int): window length
+        chr_lengths_path (str): path to json with chromosome lengths
 
     Returns:
         pd.DataFrame: resulting dataframe
         ,
         
     """
-    with open("data/chr_lengths.json", "r") as f:
-        chr_lengths = json.load(f)
+    chr_lengths = load_chr_lengths(chr_lengths_path)
     mean_telomeres_len = 10000
     num_points_per_chr = round(n_points / len(chr_lengths))
     all_points = []
@@ -110,7 +147,7 @@ def get_negative_windows(n_points: int, win_len: int) -> pd.DataFrame:
         df["chromosome"] = chrom
         values = []
         for pos in positions:
-            win_start, win_end = generate_window(chrom, pos, win_len)
+            win_start, win_end = generate_window(chrom, pos, win_len, chr_lengths_path)
             values.append((win_start, win_end))
         df["win_start"] = [el[0] for el in values]
         df["win_end"] = [el[1] for el in values]
@@ -121,45 +158,128 @@ def get_negative_windows(n_points: int, win_len: int) -> pd.DataFrame:
     return df_all
 
 
+def write_bed(
+    df: pd.DataFrame, out_path: str, chunk_size: int = 100000, index: bool = False
+) -> None:
+    """ Writes windows in bed format directly from dataframe in chunks.
+    Order of rows is kept so that the output of `bedtools getfasta` stays aligned with
+    the meta data csv.
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--win_len", help="length of window to generate", default=512, type=int
-    )
-    parser.add_argument(
-        "--run_number", help="order number of window length", default=1, type=int
+    Args:
+        df (pd.DataFrame): windows with columns "chromosome", "win_start", "win_end"
+        out_path (str): path to output bed file
+        chunk_size (int): number of rows to write at once
+        index (bool): if True, also save sorted bgzipped copy (`*.sorted.bed.gz`)
+            with tabix index (requires pysam)
+    """
+    with open(out_path, "w") as f:
+        for chunk_start in range(0, df.shape[0], chunk_size):
+            chunk = df.iloc[chunk_start : chunk_start + chunk_size]
+            lines = (
+                "chr"
+                + chunk["chromosome"].astype(str)
+                + "\t"
+                + chunk["win_start"].astype(str)
+                + "\t"
+                + chunk["win_end"].astype(str)
+            )
+            f.write("\n".join(lines) + "\n")
+    if index:
+        import pysam
+
+        sorted_path = re.sub(r"\.bed$", "", out_path) + ".sorted.bed"
+        df_sorted = df[["chromosome", "win_start", "win_end"]].sort_values(
+            ["chromosome", "win_start"]
+        )
+        write_bed(df_sorted, sorted_path, chunk_size=chunk_size)
+        # compresses with bgzip (removes uncompressed file) and builds .tbi index
+        pysam.tabix_index(sorted_path, preset="bed", force=True)
+
+
+def save_windows(
+    main_path: str,
+    breakpoints_path: str,
+    win_len: int,
+    run_number: int,
+    n_negative_points: int = 1000000,
+    index_bed: bool = False,
+    table_format: str = "csv",
+    chr_lengths_path: str = CHR_LENGTHS_PATH,
+) -> None:
+    """ Generates positive and negative windows and saves them in csv and bed formats
+
+    Args:
+        main_path (str): folder to save results
+        breakpoints_path (str): path to breakpoints data without bad regions
+        win_len (int): window length
+        run_number (int): order number of window length. New negatives are generated only
+            for the first run, the rest runs expand windows of negatives from 512 window length
+        n_negative_points (int): number of negative points to generate
+        index_bed (bool): save also sorted bgzipped bed files with tabix index
+        table_format (str): format of windows tables ("csv" or "parquet")
+        chr_lengths_path (str): path to json with chromosome lengths
+    """
+    # save positive (sorted to read parquet by cancer type and chromosome efficiently)
+    df_pos = get_positive_windows(
+        csv_path=breakpoints_path, win_len=win_len, chr_lengths_path=chr_lengths_path
     )
-    args = parser.parse_args()
-    main_path = "data/dataset/"
-    # save positive
-    df_pos = get_positive_windows(csv_path="data/breakpoints_wo_bad_regions.csv", 
-                                  win_len=args.win_len)
-    df_pos.to_csv(f"{main_path}positive_all_cancers_{args.win_len}.csv")
-    
+    df_pos = df_pos.sort_values(["cancer_type", "chromosome", "win_start"], kind="stable")
+    pos_path = os.path.join(main_path, f"positive_all_cancers_{win_len}.{table_format}")
+    save_table(df_pos, pos_path)
+
     # ATTENTION: do it only 1 time for 1 window length. Datasets with all the rest window lengths
     # should contains the same set of negative points (and not generating a differet set)
     # generate_negative - for the first time
-    neg_path = f"{main_path}negative_all_cancers_{args.win_len}.csv"
-    if args.run_number == 1:
+    neg_path = os.path.join(main_path, f"negative_all_cancers_{win_len}.{table_format}")
+    if run_number == 1:
         print("generate new negatives")
-        df_neg = get_negative_windows(n_points=1000000, win_len=args.win_len)
+        df_neg = get_negative_windows(
+            n_points=n_negative_points, win_len=win_len, chr_lengths_path=chr_lengths_path
+        )
     else:
         print("expand existing negatives")
         # use existing negative set and expand window length
         df_neg = generate_negative_different_length(
-            win_len=args.win_len, 
-            negative_path=f"{main_path}negative_all_cancers_512.csv")
-    df_neg.to_csv(neg_path)
-    
+            win_len=win_len,
+            negative_path=os.path.join(main_path, f"negative_all_cancers_512.{table_format}"),
+            chr_lengths_path=chr_lengths_path)
+    save_table(df_neg, neg_path)
+
     # save to bed format to finally get DNA sequence
-    flnms = [fl for fl in os.listdir(main_path) if fl.endswith(".csv")]
-    for fl in flnms:
-        df_windows = pd.read_csv(os.path.join(main_path, fl))
-        df_windows['chromosome'] = df_windows['chromosome'].map(lambda x: 'chr' + str(x))
-        df_windows[['chromosome', 'win_start', 'win_end']].to_csv(
-            os.path.join(main_path, fl.replace(".csv", ".bed")), 
-            sep="\t",
-            header=False,
-            index=False
-        )
+    write_bed(
+        df_pos, os.path.join(main_path, f"positive_all_cancers_{win_len}.bed"), index=index_bed
+    )
+    write_bed(
+        df_neg, os.path.join(main_path, f"negative_all_cancers_{win_len}.bed"), index=index_bed
+    )
+
+
+def extract_sequences(genome_path: str, bed_path: str, out_path: str) -> None:
+    """ Gets DNA sequences for windows from genome fasta file using bedtools
+
+    Args:
+        genome_path (str): path to genome fasta file (hg38.fa)
+        bed_path (str): path to windows in bed format
+        out_path (str): path to output file (tab separated coordinates and sequence)
+    """
+    subprocess.run(
+        ["bedtools", "getfasta", "-fi", genome_path, "-bed", bed_path, "-tab", "-fo", out_path],
+        check=True,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--win_len", help="length of window to generate", default=512, type=int
+    )
+    parser.add_argument(
+        "--run_number", help="order number of window length", default=1, type=int
+    )
+    args = parser.parse_args()
+    save_windows(
+        main_path="data/dataset/",
+        breakpoints_path="data/breakpoints_wo_bad_regions.csv",
+        win_len=args.win_len,
+        run_number=args.run_number,
+    )
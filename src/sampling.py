@@ -0,0 +1,61 @@
+""" Sampling of negative examples equally distributed by chromosomes"""
+import numpy as np
+import pandas as pd
+
+
+def get_quotas(counts: np.ndarray, n_total: int, priority: np.ndarray) -> np.ndarray:
+    """ Splits `n_total` points equally between strata. If a stratum has fewer points
+    than its share, all its points are taken and the rest is split between other strata.
+    Quotas do not decrease when `n_total` grows
+
+    Args:
+        counts (np.ndarray): number of available points in each stratum
+        n_total (int): number of points to take
+        priority (np.ndarray): order of strata to get one more point from remainder of division
+
+    Returns:
+        np.ndarray: number of points to take from each stratum
+    """
+    if n_total >= counts.sum():
+        return counts.copy()
+    n_strata = counts.shape[0]
+    remaining = n_total
+    level = 0
+    for i, count in enumerate(np.sort(counts)):
+        if count * (n_strata - i) >= remaining:
+            level = remaining // (n_strata - i)
+            break
+        remaining -= count
+    quotas = np.minimum(counts, level)
+    # remainder of division: one more point for strata which have points left, by priority
+    has_points_left = priority[counts[priority] > quotas[priority]]
+    quotas[has_points_left[: n_total - quotas.sum()]] += 1
+    return quotas
+
+
+def sample_per_stratum(strata: np.ndarray, n_total: int, seed: int = 42) -> np.ndarray:
+    """ Samples `n_total` points without replacement equally distributed by strata
+    (e.g. chromosomes) in one vectorised pass. With the same seed samples of different size
+    are nested: a smaller sample is a subset of a bigger one
+
+    Args:
+        strata (np.ndarray): stratum (chromosome) of each point
+        n_total (int): number of points to take
+        seed (int): random seed
+
+    Returns:
+        np.ndarray: sorted positions of sampled points
+    """
+    rng = np.random.default_rng(seed)
+    codes, _ = pd.factorize(strata, sort=True)
+    counts = np.bincount(codes)
+    # all random values are drawn before `n_total` is used, so quotas and order inside
+    # strata are the same for any sample size
+    keys = rng.random(codes.shape[0])
+    priority = rng.permutation(counts.shape[0])
+    quotas = get_quotas(counts, n_total, priority)
+    # random order inside each stratum, then rank of each point within its stratum
+    order = np.lexsort((keys, codes))
+    stratum_starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    ranks = np.arange(codes.shape[0]) - stratum_starts[codes[order]]
+    return np.sort(order[ranks < quotas[codes[order]]])
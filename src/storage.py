@@ -0,0 +1,155 @@
+""" Saving and loading of tables passed between pipeline steps. Format is chosen by file extension:
+* .parquet - columnar format with typed columns, reading of selected columns only and
+  filtering by chromosome / cancer type on reading (requires pyarrow)
+* .csv - previous format, kept for compatibility (stray index column "Unnamed: 0" is dropped)
+In both cases coordinates are loaded as int64, chromosome and cancer type as categories"""
+from typing import List, Optional
+import pandas as pd
+
+COORDINATE_COLUMNS = ["start", "end", "position", "win_start", "win_end", "chromStart", "chromEnd"]
+CHROMOSOME_COLUMNS = ["chr", "chromosome", "chrom"]
+CATEGORY_COLUMNS = CHROMOSOME_COLUMNS + ["cancer_type"]
+TABLE_FORMATS = ["csv", "parquet"]
+
+
+def set_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """ Casts coordinates to int64, chromosome and cancer type to categories
+
+    Args:
+        df (pd.DataFrame): table from any pipeline step
+
+    Returns:
+        pd.DataFrame: table with casted columns
+    """
+    df = df.drop(["Unnamed: 0"], axis=1, errors="ignore")
+    for col in df.columns:
+        if col in COORDINATE_COLUMNS:
+            df[col] = df[col].astype("int64")
+        elif col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype(str).astype("category")
+    return df
+
+
+def get_chromosome_column(columns: List[str]) -> Optional[str]:
+    for col in CHROMOSOME_COLUMNS:
+        if col in columns:
+            return col
+    return None
+
+
+def get_table_format(path: str) -> str:
+    """ Defines table format by file extension
+
+    Args:
+        path (str): path to the file
+
+    Returns:
+        str: "csv" or "parquet"
+    """
+    for table_format in TABLE_FORMATS:
+        if path.endswith("." + table_format):
+            return table_format
+    raise ValueError(f"Unknown table format of {path}, expected one of {TABLE_FORMATS}")
+
+
+def save_table(df: pd.DataFrame, path: str, row_group_size: int = 100000) -> None:
+    """ Saves table in format defined by file extension. In parquet each cancer type and
+    chromosome is saved in separate row groups if table is sorted by them, so that reading
+    of one cancer type or chromosome skips the rest of the file. Order of rows is kept
+
+    Args:
+        df (pd.DataFrame): table to save
+        path (str): output path (.parquet or .csv)
+        row_group_size (int): maximal number of rows in parquet row group
+    """
+    table_format = get_table_format(path)
+    df = set_dtypes(df.reset_index(drop=True))
+    if table_format == "csv":
+        df.to_csv(path, index=False)
+        return
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    group_cols = [
+        col for col in ["cancer_type", get_chromosome_column(df.columns)] if col in df.columns
+    ]
+    run_starts = [0]
+    if len(group_cols) > 0 and df.shape[0] > 0:
+        is_new_run = pd.Series(False, index=df.index)
+        for col in group_cols:
+            codes = df[col].cat.codes
+            is_new_run |= codes != codes.shift()
+        run_starts = df.index[is_new_run].tolist()
+        if len(run_starts) > df[group_cols].drop_duplicates().shape[0]:
+            # not sorted by groups: row groups by them would be too small
+            run_starts = [0]
+    run_ends = run_starts[1:] + [df.shape[0]]
+    with pq.ParquetWriter(path, table.schema) as writer:
+        for run_start, run_end in zip(run_starts, run_ends):
+            writer.write_table(
+                table.slice(run_start, run_end - run_start), row_group_size=row_group_size
+            )
+
+
+def load_table(
+    path: str,
+    columns: Optional[List[str]] = None,
+    chromosomes: Optional[List[str]] = None,
+    cancer_types: Optional[List[str]] = None,
+    chunksize: int = 200000,
+) -> pd.DataFrame:
+    """ Loads table saved by `save_table` (or csv from previous versions of the pipeline)
+
+    Args:
+        path (str): path to the file (.parquet or .csv)
+        columns (Optional[List[str]]): columns to read (all if None)
+        chromosomes (Optional[List[str]]): read only rows of these chromosomes
+        cancer_types (Optional[List[str]]): read only rows of these cancer types
+        chunksize (int): number of rows read at once from csv
+
+    Returns:
+        pd.DataFrame: loaded table
+    """
+    table_format = get_table_format(path)
+    if table_format == "parquet":
+        import pyarrow.parquet as pq
+
+        all_columns = pq.read_schema(path).names
+    else:
+        all_columns = pd.read_csv(path, nrows=0).columns.tolist()
+    conditions = []
+    chrom_col = get_chromosome_column(all_columns)
+    if chromosomes is not None:
+        assert chrom_col is not None, f"No chromosome column in {path}"
+        conditions.append((chrom_col, "in", [str(c) for c in chromosomes]))
+    if cancer_types is not None:
+        assert "cancer_type" in all_columns, f"No cancer_type column in {path}"
+        conditions.append(("cancer_type", "in", list(cancer_types)))
+
+    if table_format == "parquet":
+        df = pd.read_parquet(
+            path, engine="pyarrow", columns=columns, filters=conditions or None
+        )
+        return set_dtypes(df)
+
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(columns + [col for col, _, _ in conditions]))
+    all_chunks = []
+    for chunk in pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={col: str for col in CATEGORY_COLUMNS},
+        chunksize=chunksize,
+    ):
+        for col, _, values in conditions:
+            chunk = chunk[chunk[col].isin(values)]
+        all_chunks.append(chunk)
+    if len(all_chunks) > 0:
+        df = pd.concat(all_chunks)
+    else:
+        df = pd.read_csv(path, nrows=0, usecols=usecols)
+    if columns is not None:
+        df = df[columns]
+    return set_dtypes(df.reset_index(drop=True))
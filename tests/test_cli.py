@@ -0,0 +1,82 @@
+""" Tests for file src/cli.py"""
+import sys
+import os
+import json
+import pandas as pd
+import pytest
+
+sys.path.append(os.getcwd())
+from src.cli import get_parser, get_params, main
+
+
+def test_get_params(tmp_path):
+    config_path = os.path.join(tmp_path, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"windows": {"win_len": 4000, "run_number": 2}}, f)
+    args = get_parser().parse_args(
+        ["--config", config_path, "windows", "--run_number", "3", "--index_bed", "false"]
+    )
+    params = get_params("windows", args)
+    assert params["win_len"] == 4000
+    assert params["run_number"] == 3
+    assert params["index_bed"] is False
+    assert params["main_path"] == "data/dataset/"
+
+
+def test_unknown_config_key(tmp_path):
+    config_path = os.path.join(tmp_path, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"windows": {"win_length": 4000}}, f)
+    args = get_parser().parse_args(["--config", config_path, "windows"])
+    with pytest.raises(ValueError):
+        get_params("windows", args)
+
+
+def test_windows_command(tmp_path, monkeypatch):
+    chr_lengths_path = os.path.abspath("data/chr_lengths.json")
+    # run outside of repository root
+    monkeypatch.chdir(tmp_path)
+    breakpoints_path = os.path.join(tmp_path, "breakpoints.csv")
+    pd.DataFrame([
+        {'cancer_type': 'breast', 'chr': '1', 'start': 100000, 'end': 100001},
+        {'cancer_type': 'uterus', 'chr': '2', 'start': 200, 'end': 201},
+        ]).to_csv(breakpoints_path)
+    main([
+        "windows", "--main_path", str(tmp_path), "--breakpoints_path", breakpoints_path,
+        "--n_negative_points", "46", "--chr_lengths_path", chr_lengths_path
+    ])
+    with open(os.path.join(tmp_path, "positive_all_cancers_512.bed"), "r") as f:
+        assert f.read().splitlines() == ["chr1\t99744\t100255", "chr2\t0\t455"]
+    df_neg = pd.read_csv(os.path.join(tmp_path, "negative_all_cancers_512.csv"))
+    assert df_neg.shape[0] == 46
+
+
+@pytest.mark.parametrize("config", [
+    {"window": {"win_len": 4000}},
+    {"windows": {"win_len": [4000]}},
+    {"windows": {"win_len": "4k"}},
+    {"windows": {"table_format": "pq"}},
+    {"datasets": {"index_bed": True}},
+])
+def test_bad_config(tmp_path, config):
+    config_path = os.path.join(tmp_path, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    args = get_parser().parse_args(["--config", config_path, "windows"])
+    with pytest.raises(ValueError):
+        get_params("windows", args)
+
+
+def test_config_values_are_converted(tmp_path):
+    config_path = os.path.join(tmp_path, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"windows": {"win_len": "4000", "index_bed": "false"}}, f)
+    args = get_parser().parse_args(["--config", config_path, "windows"])
+    params = get_params("windows", args)
+    assert params["win_len"] == 4000
+    assert params["index_bed"] is False
+
+
+def test_table_format_choices():
+    with pytest.raises(SystemExit):
+        get_parser().parse_args(["windows", "--table_format", "pq"])
@@ -0,0 +1,85 @@
+""" Tests for file src/find_duplicates.py"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.getcwd())
+from src.find_duplicates import (
+    get_kmer_hashes,
+    compute_signatures,
+    get_near_duplicates,
+    get_duplicate_clusters,
+    get_leaked_pairs,
+    leakage_free_split,
+)
+
+
+def get_random_seq(rng, length):
+    return "".join(rng.choice(list("ACGT"), size=length))
+
+
+def test_get_kmer_hashes():
+    assert get_kmer_hashes("ACGT", 2).tolist() == [1, 6, 11]
+    assert get_kmer_hashes("acgNt", 2).tolist() == [1, 6]
+    assert get_kmer_hashes("AC", 3).shape[0] == 0
+    assert get_kmer_hashes("C" + "A" * 31, 32).tolist() == [4 ** 31]
+    for k in [0, 33]:
+        with pytest.raises(ValueError):
+            get_kmer_hashes("ACGT" * 10, k)
+
+
+def test_near_duplicates_and_split():
+    rng = np.random.default_rng(0)
+    base = get_random_seq(rng, 600)
+    df = pd.DataFrame([
+        {'chr': '1', 'cancer_type': 'breast', 'dna_seq': base[:512]},
+        {'chr': '2', 'cancer_type': 'uterus', 'dna_seq': base[40:552].lower()},
+        {'chr': '3', 'cancer_type': 'breast', 'dna_seq': get_random_seq(rng, 512)},
+        {'chr': '4', 'cancer_type': 'breast', 'dna_seq': get_random_seq(rng, 512)},
+        ])
+    signatures = compute_signatures(df['dna_seq'].tolist(), k=15)
+    df_pairs = get_near_duplicates(signatures, threshold=0.5)
+    assert df_pairs[['index', 'index_1']].values.tolist() == [[0, 1]]
+
+    clusters = get_duplicate_clusters(df.shape[0], df_pairs)
+    assert clusters.tolist() == [0, 0, 2, 3]
+    assert get_leaked_pairs(df, df_pairs, 'cancer_type').shape[0] == 1
+
+    train_idx, test_idx = leakage_free_split(df, clusters, test_chromosomes=['2', '3'])
+    assert train_idx.tolist() == [0, 1, 3]
+    assert test_idx.tolist() == [2]
+
+    train_idx, test_idx = leakage_free_split(df, clusters, test_size=0.5, seed=1)
+    assert len(set(clusters[train_idx]) & set(clusters[test_idx])) == 0
+    assert sorted(train_idx.tolist() + test_idx.tolist()) == [0, 1, 2, 3]
+
+
+def test_rows_without_kmers_are_not_duplicates():
+    rng = np.random.default_rng(0)
+    sequences = ["N" * 512, "NNNN", get_random_seq(rng, 20), get_random_seq(rng, 512)]
+    signatures = compute_signatures(sequences, k=21)
+    df_pairs = get_near_duplicates(signatures, threshold=0.5)
+    assert df_pairs.shape[0] == 0
+    assert get_duplicate_clusters(len(sequences), df_pairs).tolist() == [0, 1, 2, 3]
+
+
+def test_identical_windows_are_linked_to_representative():
+    rng = np.random.default_rng(0)
+    sequences = [get_random_seq(rng, 512)] * 500 + [get_random_seq(rng, 512)]
+    df_pairs = get_near_duplicates(compute_signatures(sequences, k=15), threshold=0.5)
+    assert df_pairs.shape[0] == 499
+    assert set(df_pairs['index'].tolist()) == {0}
+    clusters = get_duplicate_clusters(len(sequences), df_pairs)
+    assert np.unique(clusters).tolist() == [0, 500]
+
+
+def test_split_skips_clusters_which_do_not_fit():
+    df = pd.DataFrame({'chr': ['1'] * 10})
+    # one big cluster and 4 singletons
+    clusters = np.array([0] * 6 + [6, 7, 8, 9])
+    for seed in range(10):
+        train_idx, test_idx = leakage_free_split(df, clusters, test_size=0.2, seed=seed)
+        assert test_idx.shape[0] == 2
+        assert len(set(clusters[train_idx]) & set(clusters[test_idx])) == 0
@@ -1,9 +1,45 @@
 import sys
 import os
+import pandas as pd
+import pytest
 
 sys.path.append(os.getcwd())
-from src.generate_windows import get_sequence
+from src.generate_windows import get_sequence, write_bed
 
 
 def test_get_sequence():
     assert get_sequence(chrom="1", start="40000", end="40010") == "gcctcatgga"
+
+
+def test_write_bed(tmp_path):
+    df = pd.DataFrame([
+        {'chromosome': '2', 'win_start': 100, 'win_end': 611},
+        {'chromosome': '1', 'win_start': 0, 'win_end': 255},
+        {'chromosome': 'X', 'win_start': 5000, 'win_end': 5511},
+        ])
+    out_path = os.path.join(tmp_path, "windows.bed")
+    write_bed(df, out_path, chunk_size=2)
+    with open(out_path, "r") as f:
+        lines = f.read().splitlines()
+    assert lines == ["chr2\t100\t611", "chr1\t0\t255", "chrX\t5000\t5511"]
+
+
+def test_write_bed_with_index(tmp_path):
+    pysam = pytest.importorskip("pysam")
+    df = pd.DataFrame([
+        {'chromosome': '2', 'win_start': 100, 'win_end': 611},
+        {'chromosome': '1', 'win_start': 5000, 'win_end': 5511},
+        {'chromosome': '1', 'win_start': 0, 'win_end': 511},
+        {'chromosome': '2', 'win_start': 9000, 'win_end': 9511},
+        ])
+    out_path = os.path.join(tmp_path, "windows.bed")
+    write_bed(df, out_path, chunk_size=2, index=True)
+    sorted_path = os.path.join(tmp_path, "windows.sorted.bed.gz")
+    assert os.path.exists(sorted_path)
+    assert os.path.exists(sorted_path + ".tbi")
+    # unsorted bed is kept in original order
+    with open(out_path, "r") as f:
+        assert f.read().splitlines()[0] == "chr2\t100\t611"
+    with pysam.TabixFile(sorted_path) as tbx:
+        assert list(tbx.fetch("chr1", 0, 1000)) == ["chr1\t0\t511"]
+        assert list(tbx.fetch("chr2", 0, 10000)) == ["chr2\t100\t611", "chr2\t9000\t9511"]
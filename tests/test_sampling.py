@@ -0,0 +1,36 @@
+""" Tests for file src/sampling.py"""
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.getcwd())
+from src.sampling import get_quotas, sample_per_stratum
+
+
+def test_get_quotas():
+    counts = np.array([2, 10, 10, 3])
+    priority = np.array([2, 0, 3, 1])
+    assert get_quotas(counts, 20, priority).tolist() == [2, 7, 8, 3]
+    assert get_quotas(counts, 8, priority).tolist() == [2, 2, 2, 2]
+    assert get_quotas(counts, 9, priority).tolist() == [2, 2, 3, 2]
+    assert get_quotas(counts, 100, priority).tolist() == [2, 10, 10, 3]
+
+
+def test_sample_per_stratum():
+    strata = np.array(['1'] * 5 + ['2'] * 10 + ['X'] * 2)
+    indices = sample_per_stratum(strata, n_total=8, seed=1)
+    assert indices.shape[0] == 8
+    assert np.unique(indices).shape[0] == 8
+    assert sorted(np.unique(strata[indices], return_counts=True)[1].tolist()) == [2, 3, 3]
+    assert sample_per_stratum(strata, n_total=100).shape[0] == 17
+
+
+def test_samples_are_nested():
+    strata = np.array(['1'] * 5 + ['2'] * 10 + ['X'] * 2 + ['Y'] * 30)
+    for seed in range(20):
+        previous = set()
+        for n_total in range(1, strata.shape[0] + 1):
+            current = set(sample_per_stratum(strata, n_total=n_total, seed=seed))
+            assert len(current) == n_total
+            assert previous <= current
+            previous = current
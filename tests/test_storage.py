@@ -0,0 +1,54 @@
+""" Tests for file src/storage.py"""
+import sys
+import os
+import pandas as pd
+import pytest
+
+sys.path.append(os.getcwd())
+from src.storage import load_table, save_table
+
+
+def get_test_df():
+    return pd.DataFrame([
+        {'chromosome': '1', 'win_start': 0, 'win_end': 511, 'cancer_type': 'breast'},
+        {'chromosome': '1', 'win_start': 100, 'win_end': 611, 'cancer_type': 'uterus'},
+        {'chromosome': '2', 'win_start': 200, 'win_end': 711, 'cancer_type': 'breast'},
+        {'chromosome': 'X', 'win_start': 300, 'win_end': 811, 'cancer_type': 'breast'},
+        ])
+
+
+def test_parquet_row_groups_and_filters(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = os.path.join(tmp_path, "windows.parquet")
+    save_table(get_test_df().sort_values(['cancer_type', 'chromosome']), path)
+    # one row group per cancer type and chromosome
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_row_groups == 4
+    cancer_type_col = metadata.schema.names.index('cancer_type')
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(cancer_type_col).statistics
+        assert stats.min == stats.max
+    df = load_table(path, columns=['win_start'], chromosomes=['1', 'X'], cancer_types=['breast'])
+    assert df['win_start'].tolist() == [0, 300]
+    df = load_table(path)
+    assert str(df['chromosome'].dtype) == 'category'
+    assert str(df['win_start'].dtype) == 'int64'
+
+
+def test_csv_compatibility(tmp_path):
+    path = os.path.join(tmp_path, "windows.csv")
+    # previous versions saved index as unnamed column
+    get_test_df().to_csv(path)
+    df = load_table(path, columns=['chromosome', 'win_end'], chromosomes=[2])
+    assert df.columns.tolist() == ['chromosome', 'win_end']
+    assert df['win_end'].tolist() == [711]
+    assert 'Unnamed: 0' not in load_table(path).columns
+
+
+def test_unknown_format(tmp_path):
+    path = os.path.join(tmp_path, "windows.pq")
+    with pytest.raises(ValueError):
+        save_table(get_test_df(), path)
+    assert not os.path.exists(path)
+    with pytest.raises(ValueError):
+        load_table(path)